@@ -3,6 +3,8 @@ This module contains the configuration for running the model.
 It can be adapted to take inputs from users
 """
 
+import pandas as pd
+
 from renal_capacity_model.config_values import (
     load_time_to_event_curves,
     national_config_dict,
@@ -30,12 +32,15 @@ class Config:
         self,
         config_dict: dict = national_config_dict,
         path_to_time_to_event_curves: str = "reference/survival_time_to_event_curves",
+        time_to_event_curves: dict[str, pd.DataFrame] | None = None,
     ):
         """Initialises config for running the model
 
         Args:
             config_dict (dict, optional): Dict containing values to be used to run the model. Defaults to national_config_dict.
             path_to_time_to_event_curves (str, optional): Path to folder containing time to event curves as CSV files. Defaults to "reference/survival_time_to_event_curves".
+            time_to_event_curves (dict[str, pd.DataFrame] | None, optional): Time to event curves that have already been loaded,
+            e.g. shared between worker processes. Defaults to None, which loads them from path_to_time_to_event_curves.
         """
         self.region = config_dict["region"]
         self.centre = config_dict["centre"]
@@ -83,9 +88,11 @@ class Config:
         self.tw_liveTx = tw_liveTx
         self.tw_before_dialysis = tw_before_dialysis_values
         self.multipliers = config_dict["multipliers"]
-        self.time_to_event_curves = load_time_to_event_curves(
-            path_to_time_to_event_curves
-        )
+        if time_to_event_curves is None:
+            time_to_event_curves = load_time_to_event_curves(
+                path_to_time_to_event_curves
+            )
+        self.time_to_event_curves = time_to_event_curves
         self.hhd_intervention_target = config_dict["hhd_intervention_target"]
         self.daily_costs = config_dict["daily_costs"]
         logger.info("🔧 Config loaded successfully")
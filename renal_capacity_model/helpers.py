@@ -350,3 +350,17 @@ def calculate_time_to_event(
         float: Sampled time to event
     """
     return (scale * rng.weibull(shape)) * multiplier
+
+
+def get_run_rng(random_seed: int, run_number: int) -> np.random.Generator:
+    """Creates the Random Number Generator for a single model run. The generator only depends on
+    the base random seed and the run number, so any run can be reproduced on its own
+
+    Args:
+        random_seed (int): Base random seed, set in config
+        run_number (int): Which run number the generator is for
+
+    Returns:
+        np.random.Generator: Random Number Generator for the model run
+    """
+    return np.random.default_rng([random_seed, run_number])
@@ -0,0 +1,345 @@
+"""
+Module for running scenario sweeps: many variants of one base config, with all
+(scenario, run) tasks scheduled across a pool of worker processes
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import deepcopy
+from datetime import datetime
+from itertools import product
+
+import pandas as pd
+from tqdm import tqdm
+
+from renal_capacity_model.config import Config
+from renal_capacity_model.config_values import (
+    load_time_to_event_curves,
+    national_config_dict,
+)
+from renal_capacity_model.helpers import get_run_rng
+from renal_capacity_model.load_scenario import load_scenario_from_excel
+from renal_capacity_model.model import Model
+from renal_capacity_model.process_outputs import (
+    convert_activity_to_costs,
+    create_results_folder,
+    create_yearly_activity_duration,
+    save_result_files,
+)
+from renal_capacity_model.utils import get_logger
+
+logger = get_logger(__name__)
+
+# State held by each worker process, set once by _initialise_worker
+_worker_state: dict = {}
+
+
+def _resolve_key(config_level: dict, key: str):
+    """Config dicts use int keys for years and age groups, but paths are always strings"""
+    if key not in config_level and key.isdigit() and int(key) in config_level:
+        return int(key)
+    return key
+
+
+def _match_key_types(existing_value, new_value):
+    """Converts string keys (e.g. from JSON) to int keys where the existing config value uses int keys"""
+    if not isinstance(existing_value, dict) or not isinstance(new_value, dict):
+        return new_value
+    return {
+        _resolve_key(existing_value, str(k)): _match_key_types(
+            existing_value.get(_resolve_key(existing_value, str(k))), v
+        )
+        for k, v in new_value.items()
+    }
+
+
+def set_config_value(config_dict: dict, path: str, value) -> None:
+    """Sets a single value in a config dict, in place
+
+    Args:
+        config_dict (dict): Dict containing values to be passed to Config
+        path (str): Dot separated path to the value, e.g. "multipliers.ttd.inc" or "hhd_intervention_target.5"
+        value: Value to set
+
+    Raises:
+        ValueError: If the path does not exist in the config dict
+    """
+    *parents, last = path.split(".")
+    config_level = config_dict
+    for key in parents:
+        key = _resolve_key(config_level, key)
+        if not isinstance(config_level.get(key), dict):
+            raise ValueError(f"{path} is not a valid config path")
+        config_level = config_level[key]
+    last = _resolve_key(config_level, last)
+    if last not in config_level:
+        raise ValueError(f"{path} is not a valid config path")
+    config_level[last] = _match_key_types(config_level[last], value)
+
+
+def apply_overrides(base_config_dict: dict, overrides: dict) -> dict:
+    """Creates a new config dict from a base config dict and a set of overrides
+
+    Args:
+        base_config_dict (dict): Dict containing values to be passed to Config
+        overrides (dict): Dict where keys are dot separated paths to config values, and values are the values to set
+
+    Returns:
+        dict: Copy of the base config dict with the overrides applied
+    """
+    config_dict = deepcopy(base_config_dict)
+    for path, value in overrides.items():
+        set_config_value(config_dict, path, value)
+    return config_dict
+
+
+def expand_parameter_grid(grid: dict[str, list]) -> list[dict]:
+    """Expands a parameter grid into every combination of its values
+
+    Args:
+        grid (dict[str, list]): Dict where keys are dot separated paths to config values, and values are lists of values to try
+
+    Returns:
+        list[dict]: List of overrides, one for each combination of values
+    """
+    paths = list(grid.keys())
+    return [dict(zip(paths, values)) for values in product(*grid.values())]
+
+
+def build_scenarios(
+    grid: dict[str, list] | None = None, scenarios: list[dict] | None = None
+) -> dict[str, dict]:
+    """Builds the scenarios to run from a parameter grid and/or a list of overrides
+
+    Args:
+        grid (dict[str, list] | None, optional): Parameter grid, expanded into every combination of its values. Defaults to None.
+        scenarios (list[dict] | None, optional): List of overrides. Each may name itself with a "scenario_id" key. Defaults to None.
+
+    Returns:
+        dict[str, dict]: Dict where keys are scenario ids and values are the overrides for that scenario
+    """
+    all_overrides = expand_parameter_grid(grid) if grid else []
+    all_overrides += [deepcopy(overrides) for overrides in scenarios or []]
+    built_scenarios = {}
+    for i, overrides in enumerate(all_overrides):
+        scenario_id = str(overrides.pop("scenario_id", f"scenario_{i + 1:03d}"))
+        if scenario_id in built_scenarios:
+            raise ValueError(f"Duplicate scenario_id: {scenario_id}")
+        built_scenarios[scenario_id] = overrides
+    return built_scenarios
+
+
+def results_to_tidy(
+    results_df: pd.DataFrame,
+    costs_dfs: dict[str, pd.DataFrame],
+    scenario_id: str,
+    model_run: int,
+) -> pd.DataFrame:
+    """Converts the results of a single model run to a long table
+
+    Args:
+        results_df (pd.DataFrame): Results dataframe from a model run
+        costs_dfs (dict[str, pd.DataFrame]): Yearly costs for each activity, from convert_activity_to_costs
+        scenario_id (str): Scenario the model run belongs to
+        model_run (int): Which model run the results are from
+
+    Returns:
+        pd.DataFrame: Table with columns scenario_id, model_run, measure, year and value
+    """
+    tidy_dfs = [
+        results_df.rename_axis(index="measure", columns="year")
+        .stack()
+        .rename("value")
+        .reset_index()
+    ]
+    for activity, costs_df in costs_dfs.items():
+        tidy_dfs.append(
+            costs_df.rename_axis(index=None, columns="year")
+            .stack()
+            .rename("value")
+            .reset_index(level="year")
+            .assign(measure=f"cost_{activity}")
+        )
+    tidy = pd.concat(tidy_dfs, ignore_index=True)
+    tidy["year"] = tidy["year"].astype(int)
+    tidy.insert(0, "model_run", model_run)
+    tidy.insert(0, "scenario_id", scenario_id)
+    return tidy[["scenario_id", "model_run", "measure", "year", "value"]]
+
+
+def _initialise_worker(
+    base_config_dict: dict,
+    time_to_event_curves: dict[str, pd.DataFrame],
+    run_start_time: str,
+):
+    """Runs once in each worker process, so the time to event curves are only sent once per worker"""
+    _worker_state["base_config_dict"] = base_config_dict
+    _worker_state["time_to_event_curves"] = time_to_event_curves
+    _worker_state["run_start_time"] = run_start_time
+    _worker_state["configs"] = {}
+
+
+def _get_worker_config(scenario_id: str, overrides: dict) -> Config:
+    """Builds the config for a scenario, reusing it for later runs of the same scenario"""
+    if scenario_id not in _worker_state["configs"]:
+        _worker_state["configs"][scenario_id] = Config(
+            apply_overrides(_worker_state["base_config_dict"], overrides),
+            time_to_event_curves=_worker_state["time_to_event_curves"],
+        )
+    return _worker_state["configs"][scenario_id]
+
+
+def _run_sweep_task(scenario_id: str, overrides: dict, run_number: int) -> pd.DataFrame:
+    """Runs a single model run for a scenario in a worker process
+
+    Returns:
+        pd.DataFrame: Tidy results for the model run
+    """
+    config = _get_worker_config(scenario_id, overrides)
+    model = Model(
+        run_number,
+        get_run_rng(config.random_seed, run_number),
+        config,
+        os.path.join(_worker_state["run_start_time"], scenario_id),
+    )
+    model.run()
+    yearly_activity_duration = create_yearly_activity_duration(
+        model.event_log, run_number + 1
+    )
+    costs_dfs = convert_activity_to_costs(yearly_activity_duration, config.daily_costs)
+    return results_to_tidy(model.results_df, costs_dfs, scenario_id, run_number + 1)
+
+
+def run_sweep(
+    base_config_dict: dict,
+    scenarios: dict[str, dict],
+    run_start_time: str,
+    number_of_runs: int | None = None,
+    max_workers: int | None = None,
+    path_to_time_to_event_curves: str = "reference/survival_time_to_event_curves",
+) -> pd.DataFrame:
+    """Runs every scenario for the configured number of runs, across a pool of worker processes.
+    Each run uses the same random number streams in every scenario, so differences between
+    scenarios are not hidden by sampling noise.
+
+    Args:
+        base_config_dict (dict): Dict containing values to be passed to Config, which the scenarios override
+        scenarios (dict[str, dict]): Dict where keys are scenario ids and values are overrides, from build_scenarios
+        run_start_time (str): Start time of the sweep, used for the results folder
+        number_of_runs (int | None, optional): Runs per scenario. Defaults to None, which uses number_of_runs from the base config.
+        max_workers (int | None, optional): Number of worker processes. Defaults to None, which uses the number of CPUs.
+        path_to_time_to_event_curves (str, optional): Path to folder containing time to event curves as CSV files. Defaults to "reference/survival_time_to_event_curves".
+
+    Returns:
+        pd.DataFrame: Tidy results for every scenario and run, with columns scenario_id, model_run, measure, year and value
+    """
+    for overrides in scenarios.values():
+        apply_overrides(base_config_dict, overrides)  # fail early on invalid paths
+    if number_of_runs is None:
+        number_of_runs = base_config_dict.get("number_of_runs", 20)
+    time_to_event_curves = load_time_to_event_curves(path_to_time_to_event_curves)
+    tasks = [
+        (scenario_id, overrides, run)
+        for run in range(number_of_runs)
+        for scenario_id, overrides in scenarios.items()
+    ]
+    logger.info(
+        f"🧹 Running {len(scenarios)} scenario(s) x {number_of_runs} run(s) across {max_workers or os.cpu_count()} worker(s)"
+    )
+    tidy_results = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_initialise_worker,
+        initargs=(base_config_dict, time_to_event_curves, run_start_time),
+    ) as executor:
+        futures = [executor.submit(_run_sweep_task, *task) for task in tasks]
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            tidy_results.append(future.result())
+    logger.info("✅🥳 Sweep complete!")
+    sweep_results = (
+        pd.concat(tidy_results, ignore_index=True)
+        .sort_values(["scenario_id", "model_run", "measure", "year"])
+        .reset_index(drop=True)
+    )
+    path_to_results = create_results_folder(run_start_time)
+    save_result_files(sweep_results, "sweep_results", path_to_results)
+    save_result_files(scenarios_to_table(scenarios), "sweep_scenarios", path_to_results)
+    return sweep_results
+
+
+def scenarios_to_table(scenarios: dict[str, dict]) -> pd.DataFrame:
+    """Table of the overrides used in each scenario, for saving alongside the sweep results
+
+    Args:
+        scenarios (dict[str, dict]): Dict where keys are scenario ids and values are overrides
+
+    Returns:
+        pd.DataFrame: Table with one row per scenario and one column per overridden config path
+    """
+    rows = {
+        scenario_id: {
+            path: value if not isinstance(value, dict) else json.dumps(value)
+            for path, value in overrides.items()
+        }
+        for scenario_id, overrides in scenarios.items()
+    }
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis("scenario_id")
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sweep_filepath",
+        help='Path to a JSON file containing a "grid" of config paths to lists of values, and/or a list of "scenarios" of overrides',
+        type=str,
+        required=True,
+    )
+    parser.add_argument(
+        "--input_filepath",
+        help="Path to the Renal Modelling Input Excel file used as the base config. If omitted, defaults to National model",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--validation",
+        help="Whether to load validation or experimental values from the input Excel file. Defaults to experimental",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--number_of_runs",
+        help="Number of runs for each scenario. Defaults to number_of_runs in the base config",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--max_workers",
+        help="Number of worker processes. Defaults to the number of CPUs",
+        type=int,
+        default=None,
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.input_filepath:
+        base_config_dict = load_scenario_from_excel(
+            args.input_filepath, args.validation
+        )
+    else:
+        base_config_dict = national_config_dict
+    with open(args.sweep_filepath) as f:
+        sweep_definition = json.load(f)
+    scenarios = build_scenarios(
+        sweep_definition.get("grid"), sweep_definition.get("scenarios")
+    )
+    run_sweep(
+        base_config_dict,
+        scenarios,
+        datetime.now().strftime("%Y%m%d-%H%M"),
+        number_of_runs=args.number_of_runs,
+        max_workers=args.max_workers,
+    )
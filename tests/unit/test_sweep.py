@@ -0,0 +1,65 @@
+import pytest
+from renal_capacity_model.config_values import national_config_dict
+from renal_capacity_model.sweep import (
+    apply_overrides,
+    build_scenarios,
+    expand_parameter_grid,
+)
+
+
+def test_apply_overrides_sets_nested_and_year_values():
+    # arrange
+    overrides = {
+        "multipliers.ttd.inc": 1.2,
+        "hhd_intervention_target.5": 0.1,
+        "daily_costs": {"ichd": 100, "hhd": 90, "pd": 80, "transplant": 10},
+    }
+
+    # act
+    config_dict = apply_overrides(national_config_dict, overrides)
+
+    # assert
+    assert config_dict["multipliers"]["ttd"]["inc"] == 1.2
+    assert config_dict["hhd_intervention_target"][5] == 0.1
+    assert config_dict["hhd_intervention_target"][4] == -1
+    assert config_dict["daily_costs"]["ichd"] == 100
+    assert national_config_dict["multipliers"]["ttd"]["inc"] == 1  # base unchanged
+
+
+def test_apply_overrides_converts_json_year_keys():
+    # act
+    config_dict = apply_overrides(
+        national_config_dict,
+        {"hhd_intervention_target": {str(y): 0.2 for y in range(1, 14)}},
+    )
+
+    # assert
+    assert config_dict["hhd_intervention_target"][13] == 0.2
+
+
+def test_apply_overrides_raises_error_for_invalid_path():
+    with pytest.raises(ValueError):
+        apply_overrides(national_config_dict, {"multipliers.not_a_multiplier": 1})
+
+
+def test_expand_parameter_grid():
+    # act
+    overrides = expand_parameter_grid(
+        {"multipliers.ttd.inc": [0.9, 1, 1.1], "multipliers.tw.inc.live": [1, 2]}
+    )
+
+    # assert
+    assert len(overrides) == 6
+    assert {"multipliers.ttd.inc": 1.1, "multipliers.tw.inc.live": 2} in overrides
+
+
+def test_build_scenarios_names_scenarios():
+    # act
+    scenarios = build_scenarios(
+        grid={"multipliers.ttd.inc": [0.9, 1.1]},
+        scenarios=[{"scenario_id": "hhd_target", "hhd_intervention_target.5": 0.1}],
+    )
+
+    # assert
+    assert list(scenarios) == ["scenario_001", "scenario_002", "hhd_target"]
+    assert scenarios["hhd_target"] == {"hhd_intervention_target.5": 0.1}